@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from datetime import datetime
 import gspread
 from gspread.exceptions import APIError
@@ -6,6 +6,30 @@ from google.oauth2.service_account import Credentials
 import streamlit as st
 
 
+@st.cache_resource(show_spinner=False)
+def _open_sheets(sheet_id: str, sheet_name: str):
+    """Authorize one gspread client per process and open the spreadsheet and user worksheet"""
+    scope = [
+        'https://spreadsheets.google.com/feeds',
+        'https://www.googleapis.com/auth/drive'
+    ]
+    creds = Credentials.from_service_account_info(
+        st.secrets["google_service_account"],
+        scopes=scope
+    )
+    client = gspread.authorize(creds)
+    sheet = client.open_by_key(sheet_id)
+    return sheet, sheet.worksheet(sheet_name)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _load_user_index(sheet_id: str, sheet_name: str) -> Dict[str, Tuple[int, Dict]]:
+    """Read all employee rows in one call, indexed by lowercased username -> (sheet row, record)"""
+    _, worksheet = _open_sheets(sheet_id, sheet_name)
+    # Row 1 is the header, so records start at sheet row 2
+    return {user['username'].lower(): (i + 2, user) for i, user in enumerate(worksheet.get_all_records())}
+
+
 class Authenticator:
     def __init__(self, config):
         self.config = config
@@ -15,19 +39,9 @@ class Authenticator:
         self.worksheet = None
 
     def _connect_to_google_sheets(self):
-        """Establish connection to Google Sheets using Streamlit secrets"""
+        """Establish connection to Google Sheets using Streamlit secrets (shared across sessions)"""
         try:
-            scope = [
-                'https://spreadsheets.google.com/feeds',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            creds = Credentials.from_service_account_info(
-                st.secrets["google_service_account"],
-                scopes=scope
-            )
-            client = gspread.authorize(creds)
-            self.sheet = client.open_by_key(self.config.GOOGLE_SHEETS_ID)
-            self.worksheet = self.sheet.worksheet(self.config.SHEET_NAME)
+            self.sheet, self.worksheet = _open_sheets(self.config.GOOGLE_SHEETS_ID, self.config.SHEET_NAME)
             return True
         except Exception as e:
             raise Exception(f"Google Sheets connection failed: {str(e)}")
@@ -38,7 +52,7 @@ class Authenticator:
             if not self._connect_to_google_sheets():
                 raise Exception("Could not connect to Google Sheets")
 
-            data = self.worksheet.get_all_records()
+            data = _load_user_index(self.config.GOOGLE_SHEETS_ID, self.config.SHEET_NAME)
             if not data:
                 raise ValueError("No data found in Google Sheet")
             self.user_data = data
@@ -48,15 +62,14 @@ class Authenticator:
             raise Exception(f"Failed to load user data: {str(e)}")
 
     def authenticate(self, username: str, password: str) -> bool:
-        """Authenticate user credentials with real-time Google Sheets check"""
+        """Authenticate user credentials against the (30s cached) Google Sheets data"""
         try:
             self.load_user_data()
             password = int(password)
-            for user in self.user_data:
-                if (user['username'].lower() == username.lower() and 
-                    user['password'] == password):
-                    self.authenticated_user = user
-                    return True
+            entry = self.user_data.get(username.lower())
+            if entry and entry[1]['password'] == password:
+                self.authenticated_user = entry[1]
+                return True
             return False
         except ValueError:
             return False
@@ -64,15 +77,14 @@ class Authenticator:
             raise Exception(f"Authentication error: {str(e)}")
 
     def get_authenticated_user(self) -> Optional[Dict]:
-        """Get authenticated user data with real-time refresh"""
+        """Get authenticated user data, refreshed from the (30s cached) Google Sheets data"""
         try:
             if self.authenticated_user:
                 self.load_user_data()
-                username = self.authenticated_user['username']
-                for user in self.user_data:
-                    if user['username'].lower() == username.lower():
-                        self.authenticated_user = user
-                        return user
+                entry = self.user_data.get(self.authenticated_user['username'].lower())
+                if entry:
+                    self.authenticated_user = entry[1]
+                    return entry[1]
         except Exception as e:
             print(f"Error refreshing user data: {str(e)}")
         return None
@@ -81,9 +93,21 @@ class Authenticator:
         """Apply for leave and update Google Sheet"""
         try:
             self.load_user_data()
-            cell = self.worksheet.find(username.lower(), in_column=1)
-            row = cell.row
-            remaining_leaves = float(self.worksheet.cell(row, 4).value)
+            entry = self.user_data.get(username.lower())
+            if not entry:
+                raise ValueError("User not found")
+            row = entry[0]
+
+            # Read the row itself fresh; the cached row number may be stale if rows moved
+            values = self.worksheet.row_values(row)
+            if not values or str(values[0]).lower() != username.lower():
+                _load_user_index.clear()
+                cell = self.worksheet.find(username, in_column=1, case_sensitive=False)
+                if cell is None:
+                    raise ValueError("User not found")
+                row = cell.row
+                values = self.worksheet.row_values(row)
+            remaining_leaves = float(values[3])
 
             if days <= 0:
                 raise ValueError("Leave days must be positive")
@@ -96,6 +120,7 @@ class Authenticator:
 
             new_remaining = remaining_leaves - days
             self.worksheet.update_cell(row, 4, new_remaining)
+            _load_user_index.clear()
 
             leave_history = self.sheet.worksheet("LeaveHistory") if "LeaveHistory" in [ws.title for ws in self.sheet.worksheets()] else self.sheet.add_worksheet(title="LeaveHistory", rows=100, cols=4)
             leave_history.append_row([
@@ -0,0 +1,50 @@
+import sqlite3
+from contextlib import closing
+from typing import Dict, List
+
+
+class ChatHistoryStore:
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS chat_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL
+                )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_messages (session_id, username)"
+            )
+
+    def _connect(self):
+        # Callers wrap this in closing(...): the connection's own context manager only commits
+        return sqlite3.connect(self.db_path)
+
+    def load(self, session_id: str, username: str) -> List[Dict]:
+        """Load a user's chat history for a browser session, oldest first"""
+        with closing(self._connect()) as conn, conn:
+            rows = conn.execute(
+                "SELECT role, content FROM chat_messages WHERE session_id = ? AND username = ? ORDER BY id",
+                (session_id, username)
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def append(self, session_id: str, username: str, messages: List[Dict]) -> None:
+        """Append messages to a user's chat history in one transaction"""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT INTO chat_messages (session_id, username, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, username, m["role"], m["content"]) for m in messages]
+            )
+
+    def clear(self, session_id: str, username: str) -> None:
+        """Delete a user's chat history for a browser session"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM chat_messages WHERE session_id = ? AND username = ?",
+                (session_id, username)
+            )
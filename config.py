@@ -1,5 +1,6 @@
 import os
 import streamlit as st
+import google.generativeai as genai
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -21,8 +22,14 @@ class Config:
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 200
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    ONNX_MODEL_DIR = os.path.join(os.path.dirname(__file__), "onnx_int8")  # int8 export of EMBEDDING_MODEL
     SEARCH_K = 3
     
+    # Semantic Answer Cache
+    SEMANTIC_CACHE_SIZE = 256
+    SEMANTIC_CACHE_THRESHOLD = 0.95
+    SEMANTIC_CACHE_MIN_OVERLAP = 0.6  # Jaccard overlap of retrieved chunks
+    
     # Gemini Configuration
     GEMINI_MODEL = "gemini-2.0-flash-exp"
     GEMINI_TEMPERATURE = 0.3
@@ -41,6 +48,7 @@ class Config:
     
     # Session Configuration
     SESSION_TIMEOUT = 3600  # 1 hour in seconds
+    CHAT_DB_PATH = os.path.join(os.path.dirname(__file__), "chat_history.db")
     
     @classmethod
     def validate_config(cls):
@@ -55,4 +63,7 @@ class Config:
         if missing_fields:
             raise ValueError(f"Missing required configuration: {', '.join(missing_fields)}")
         
-        return True
\ No newline at end of file
+        return True
+
+# Configure the Gemini client once per process
+genai.configure(api_key=Config.GEMINI_API_KEY)
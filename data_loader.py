@@ -5,15 +5,17 @@ import pandas as pd
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
+import faiss
 import numpy as np
 from io import BytesIO
 from typing import List
 from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from config import Config
+from onnx_embedder import OnnxEmbedder
 
 
 class PolicyDataLoader:
@@ -24,7 +26,7 @@ class PolicyDataLoader:
         self.retriever = None
         self.all_chunks = []
         self.chunk_embeddings = None
-        self.embedder = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        self.embedder = OnnxEmbedder(Config.EMBEDDING_MODEL, Config.ONNX_MODEL_DIR)
 
     def _load_pdf_documents(self) -> List[Document]:
         """Load and chunk TXT file instead of PDF (name unchanged)."""
@@ -90,11 +92,27 @@ class PolicyDataLoader:
             print(f"📚 Total Documents for Embedding: {len(all_docs)}")
 
             chunk_texts = [doc.page_content for doc in all_docs]
-            self.chunk_embeddings = self.embedder.encode(chunk_texts)
+            self.chunk_embeddings = self.embedder.encode(
+                chunk_texts,
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            ).astype(np.float32)
             print(f"🧮 Precomputed embeddings shape: {self.chunk_embeddings.shape}")
 
-            embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-            self.vectorstore = FAISS.from_documents(all_docs, embeddings)
+            # HNSW graph over int8 scalar-quantized vectors, built from the embeddings above
+            index = faiss.IndexHNSWSQ(self.chunk_embeddings.shape[1], faiss.ScalarQuantizer.QT_8bit, 32)
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = 64
+            index.train(self.chunk_embeddings)
+            index.add(self.chunk_embeddings)
+
+            self.vectorstore = FAISS(
+                embedding_function=self.embedder,
+                index=index,
+                docstore=InMemoryDocstore({str(i): doc for i, doc in enumerate(all_docs)}),
+                index_to_docstore_id={i: str(i) for i in range(len(all_docs))}
+            )
             self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 10})
 
             print("✅ Vectorstore and retriever successfully created.")
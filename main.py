@@ -6,14 +6,11 @@ from data_loader import PolicyDataLoader  # Fixed import name
 from rag_system import PolicyRAGSystem
 from query_handler import QueryHandler
 import sys
-import google.generativeai as genai
 
 
 class LeavePolicyAssistant:
     def __init__(self, config):
         self.config = config
-        # Configure Gemini API
-        genai.configure(api_key=config.GEMINI_API_KEY)
         self.authenticator = Authenticator(config)
         self.document_loader = PolicyDataLoader(config.POLICY_PDF_PATH)  # Fixed class name
         self.rag_system = None
@@ -37,7 +34,8 @@ class LeavePolicyAssistant:
         try:
             self.rag_system = PolicyRAGSystem(
                 retriever=self.document_loader.get_retriever(),
-                config=self.config
+                config=self.config,
+                embedder=self.document_loader.embedder
             )
             self.rag_system.initialize_llm()
             self.rag_system.setup_qa_chain()
@@ -0,0 +1,66 @@
+import os
+import numpy as np
+from typing import List, Union
+from langchain_core.embeddings import Embeddings
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+def export_quantized_model(model_name: str, onnx_dir: str) -> None:
+    """Export a sentence-transformers model to ONNX and quantize its weights to int8"""
+    print(f"🛠️ Exporting {model_name} to int8 ONNX in {onnx_dir}...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(
+        save_dir=onnx_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    )
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(onnx_dir)
+
+
+class OnnxEmbedder(Embeddings):
+    """Int8 ONNX Runtime replacement for SentenceTransformer.encode (mean pooling, optional L2 norm)"""
+
+    def __init__(self, model_name: str, onnx_dir: str, max_length: int = 256):
+        if not os.path.exists(os.path.join(onnx_dir, QUANTIZED_FILE_NAME)):
+            export_quantized_model(model_name, onnx_dir)
+
+        self.model = ORTModelForFeatureExtraction.from_pretrained(onnx_dir, file_name=QUANTIZED_FILE_NAME)
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        self.max_length = max_length
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            token_embeddings = self.model(**inputs).last_hidden_state
+
+            # Mean pooling over non-padding tokens
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(pooled.astype(np.float32))
+
+        embeddings = np.concatenate(batches) if batches else np.empty((0, self.model.config.hidden_size), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts, normalize_embeddings=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode(text, normalize_embeddings=True).tolist()
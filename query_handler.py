@@ -1,7 +1,29 @@
-from typing import Dict, Optional
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterator, NamedTuple, Optional
 from datetime import datetime
 import streamlit as st
 
+# Keyword triggers, compiled once per process
+_LEAVE_BAL_RE = re.compile(r"\b(?:leave balance|remaining leaves|how many leaves|my leaves)\b")
+_GREET_RE = re.compile(r"\b(?:hello|hi|hey|good morning|good afternoon)\b")
+_HELP_RE = re.compile(r"\b(?:help|what can you do|how to use|commands)\b")
+_THANKS_RE = re.compile(r"\b(?:thank you|thanks|appreciate)\b")
+_LEAVE_RE = re.compile(r"\bleaves?\b")
+
+# Leave days in an application: the first whitespace-delimited numeric token, sign
+# included, so e.g. "-2" still reaches apply_for_leave's validation and "12/05" is skipped
+_DAYS_RE = re.compile(r"(?<!\S)([-+]?(?:\d+(?:\.\d*)?|\.\d+))(?!\S)")
+
+class ParsedQuery(NamedTuple):
+    lower: str                # lowercased, stripped query text
+    days: Optional[float]     # first number in the query, if any
+    mentions_leave: bool
+
+# Background threads for Sheets refreshes that overlap with Gemini calls
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="user-refresh")
+
 class QueryHandler:
     def __init__(self, authenticated_user: Dict, rag_system, authenticator):
         self.user = authenticated_user
@@ -9,51 +31,95 @@ class QueryHandler:
         self.authenticator = authenticator
         self.hr_contact = "hr@bankname.com"
 
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _parse(query: str) -> ParsedQuery:
+        """Derive everything the query routing needs from the raw text, once per distinct query"""
+        query_lower = query.lower().strip()
+        match = _DAYS_RE.search(query_lower)
+        return ParsedQuery(
+            lower=query_lower,
+            days=float(match.group(1)) if match else None,
+            mentions_leave=bool(_LEAVE_RE.search(query_lower))
+        )
+
     def _refresh_user_data(self):
         """Refresh user data from Google Sheets and update session state"""
         try:
-            updated_user = self.authenticator.get_authenticated_user()
-            if updated_user:
-                self.user = updated_user
-                st.session_state.user = updated_user
-                return True
+            # Served from the authenticator's 30s user index, so repeated refreshes are cheap
+            return self._apply_user_data(self.authenticator.get_authenticated_user())
         except Exception as e:
             st.warning(f"Could not refresh user data: {str(e)}")
             return False
 
-    def handle_query(self, query: str) -> str:
-        """Process user queries with semantic understanding"""
-        query_lower = query.lower().strip()
+    def _apply_user_data(self, updated_user: Optional[Dict]) -> bool:
+        """Store a freshly fetched user record on the handler and in session state"""
+        if updated_user:
+            self.user = updated_user
+            st.session_state.user = updated_user
+            return True
+        return False
+
+    def _start_refresh(self, parsed: ParsedQuery) -> Optional[Future]:
+        """Start refreshing user data in the background if the query mentions leave"""
+        if not parsed.mentions_leave:
+            return None
+        return _refresh_pool.submit(self.authenticator.get_authenticated_user)
+
+    def _finish_refresh(self, refresh: Optional[Future]) -> None:
+        """Wait for a background refresh started by _start_refresh and apply it"""
+        if refresh is None:
+            return
+        try:
+            self._apply_user_data(refresh.result())
+        except Exception as e:
+            st.warning(f"Could not refresh user data: {str(e)}")
+
+    def _handle_direct_query(self, parsed: ParsedQuery) -> Optional[str]:
+        """Answer queries that don't need the policy documents, or return None"""
+        query_lower = parsed.lower
 
         # Handle leave application explicitly
         if query_lower.startswith("apply for leave"):
-            return self._handle_leave_application(query_lower)
+            return self._handle_leave_application(parsed)
 
         # Handle leave balance queries
-        if any(term in query_lower for term in ["leave balance", "remaining leaves", "how many leaves", "my leaves"]):
+        if _LEAVE_BAL_RE.search(query_lower):
             self._refresh_user_data()
             return f"💼 Your current leave balance: **{self.user.get('remaining_leaves', 'N/A')} days**"
 
         # Handle greetings and casual queries
-        if any(term in query_lower for term in ["hello", "hi", "hey", "good morning", "good afternoon"]):
+        if _GREET_RE.search(query_lower):
             return f"Hello {self.user['username']}! 👋 I'm here to help you with bank policy questions and leave applications. What can I assist you with today?"
 
         # Handle help queries
-        if any(term in query_lower for term in ["help", "what can you do", "how to use", "commands"]):
+        if _HELP_RE.search(query_lower):
             return self._get_help_response()
 
         # Handle thank you
-        if any(term in query_lower for term in ["thank you", "thanks", "appreciate"]):
+        if _THANKS_RE.search(query_lower):
             return "You're welcome! 😊 Feel free to ask me anything else about bank policies or leave applications."
 
+        return None
+
+    def handle_query(self, query: str) -> str:
+        """Process user queries with semantic understanding"""
+        parsed = self._parse(query)
+        direct_response = self._handle_direct_query(parsed)
+        if direct_response is not None:
+            return direct_response
+
         # Otherwise: treat it as a semantic HR policy query
         try:
+            refresh = self._start_refresh(parsed)
             response = self.rag_system.query_policy(query, self.user.get('grade'))
 
             # Retry once if empty/null
             if not response or not response.strip():
                 response = self.rag_system.query_policy(query, self.user.get('grade'))
 
+            self._finish_refresh(refresh)
+
             # If still nothing, return fallback message
             if not response or not response.strip():
                 return (
@@ -66,20 +132,36 @@ class QueryHandler:
         except Exception as e:
             return f"⚠️ Sorry, there was an error processing your question: {str(e)}"
 
-    def _handle_leave_application(self, query: str) -> str:
+    def stream_query(self, query: str) -> Iterator[str]:
+        """Like handle_query, but yields policy answers incrementally as they are generated"""
+        parsed = self._parse(query)
+        direct_response = self._handle_direct_query(parsed)
+        if direct_response is not None:
+            yield direct_response
+            return
+
+        try:
+            refresh = self._start_refresh(parsed)
+            streamed = []
+            for chunk in self.rag_system.stream_policy(query, self.user.get('grade')):
+                streamed.append(chunk)
+                yield chunk
+
+            # Nothing came back: fall back to a blocking retry, then the HR message
+            self._finish_refresh(refresh)
+            if not "".join(streamed).strip():
+                yield self._refine_policy_response(self.rag_system.query_policy(query, self.user.get('grade')))
+                return
+
+            yield self._leave_balance_note("".join(streamed))
+
+        except Exception as e:
+            yield f"⚠️ Sorry, there was an error processing your question: {str(e)}"
+
+    def _handle_leave_application(self, parsed: ParsedQuery) -> str:
         """Process leave application"""
         try:
-            # Parse leave days from query
-            parts = query.split()
-            days = None
-            
-            # Try to find the number in the query
-            for part in parts:
-                try:
-                    days = float(part)
-                    break
-                except ValueError:
-                    continue
+            days = parsed.days
 
             if not days:
                 return "❌ Please specify leave days like: 'apply for leave 2.5' or 'apply for leave 1'"
@@ -112,11 +194,13 @@ class QueryHandler:
                 f"Please contact HR at **{self.hr_contact}** for assistance."
             )
 
-        # Add user-specific leave balance if the response mentions leave
-        if "leave" in response.lower() and "remaining_leaves" in self.user:
-            response += f"\n\n💼 **Your current leave balance:** {self.user['remaining_leaves']} days"
+        return (response + self._leave_balance_note(response)).strip()
 
-        return response.strip()
+    def _leave_balance_note(self, response: str) -> str:
+        """User-specific leave balance to append if the response mentions leave"""
+        if "leave" in response.lower() and "remaining_leaves" in self.user:
+            return f"\n\n💼 **Your current leave balance:** {self.user['remaining_leaves']} days"
+        return ""
 
     def _get_help_response(self) -> str:
         """Provide help information to the user"""
@@ -148,4 +232,4 @@ class QueryHandler:
             "• **Leave applications and balances**\n"
             "• **HR procedures and guidelines**\n\n"
             "Try rephrasing your question or type 'help' for more examples!"
-        )
\ No newline at end of file
+        )
@@ -1,29 +1,42 @@
 
 import google.generativeai as genai
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
 import logging
-from typing import Optional
+import numpy as np
+import threading
+from collections import OrderedDict
+from onnx_embedder import OnnxEmbedder
+from typing import Iterator, Optional
 
 
 class PolicyRAGSystem:
-    def __init__(self, retriever, config, data_loader=None):
+    def __init__(self, retriever, config, data_loader=None, embedder=None):
         self.retriever = retriever
         self.data_loader = data_loader
         self.llm = None
-        self.chain = None
+        self._template_str = None
         self.config = config
         self.llm_ready = False
 
+        # The embedder can be shared with a data loader so the ONNX model is loaded only once
+        if embedder is None:
+            embedder = data_loader.embedder if data_loader else OnnxEmbedder(self.config.EMBEDDING_MODEL, self.config.ONNX_MODEL_DIR)
+        self.embedder = embedder
+
+        # Semantic answer cache: row index in _cache_keys -> (chunk ids, answer), in LRU order
+        self._cache = OrderedDict()
+        self._cache_keys = None
+        # Held around every cache read/write: the system is shared by all sessions' script threads
+        self._cache_lock = threading.Lock()
+
+        # Last (query, retrieval result), so a retry of the same query skips retrieval
+        self._last = (None, None)
+
         logging.basicConfig(
             filename='rag_logs.txt',
             level=logging.INFO,
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
-        genai.configure(api_key=self.config.GEMINI_API_KEY)
-
     def initialize_llm(self) -> None:
         try:
             self.llm = genai.GenerativeModel(
@@ -40,15 +53,22 @@ class PolicyRAGSystem:
             raise Exception(f"Failed to initialize Gemini: {str(e)}")
 
     def custom_retriever(self, query):
+        """Return the context string and the ids (content hashes) of the chunks it was built from"""
+        last_query, last_result = self._last
+        if query == last_query:
+            return last_result
+
         if self.data_loader:
-            reranked_chunks = self.data_loader.get_reranked_chunks(query, top_k=5)
-            context = "\n\n".join([chunk.page_content for chunk in reranked_chunks])
+            docs = self.data_loader.get_reranked_chunks(query, top_k=5)
             logging.info(f"Custom reranking applied for query: {query}")
-            logging.info(f"Retrieved {len(reranked_chunks)} reranked chunks")
-            return context
+            logging.info(f"Retrieved {len(docs)} reranked chunks")
         else:
             docs = self.retriever.invoke(query)
-            return "\n\n".join([doc.page_content for doc in docs])
+
+        context = "\n\n".join([doc.page_content for doc in docs])
+        chunk_ids = frozenset(hash(doc.page_content) for doc in docs)
+        self._last = (query, (context, chunk_ids))
+        return context, chunk_ids
 
     def setup_qa_chain(self) -> None:
         if not self.llm_ready or self.retriever is None:
@@ -116,68 +136,126 @@ Question: {question}
    - Then follow all strict rules above: provide only the precise answer based on the context, no extra commentary or formatting."
 
 Your answer must be accurate, minimal, and based only on the provided context.
+Respond in no more than 4 sentences.
 """
 
+        # Filled with str.format_map per query; {context} and {question} are the only fields
+        self._template_str = template
 
-        prompt = ChatPromptTemplate.from_template(template)
-
-        self.chain = (
-            {
-                "context": lambda x: self.custom_retriever(x["question"]),
-                "question": lambda x: x["question"]
-                
-            }
-            | prompt
-            | self._invoke_gemini
-        )
-
-    def _invoke_gemini(self, prompt) -> str:
+    def _invoke_gemini(self, prompt_str: str) -> str:
         try:
-            prompt_str = prompt.to_string()
             response = self.llm.generate_content(
                 prompt_str,
-                generation_config={
-                    "temperature": self.config.GEMINI_TEMPERATURE,
-                    "max_output_tokens": 800
-                }
+                generation_config=self._generation_config()
             )
-            result = response.text.strip()
-
-            if result.count(". ") > 4 or len(result) > 600:
-                logging.info("Summarizing Gemini response for conciseness...")
-                summarization_prompt = (
-                    "Summarize the following text into 2–4 concise natural sentences, "
-                    "preserving all key HR policy details, without using bullets or headings:\n\n" + result
-                )
-                summary_response = self.llm.generate_content(
-                    summarization_prompt,
-                    generation_config={
-                        "temperature": 0.3,
-                        "max_output_tokens": 400
-                    }
-                )
-                summarized = summary_response.text.strip()
-                logging.info(f"Summarized response: {summarized}")
-                return summarized
-            else:
-                return result
-
+            return response.text.strip()
         except Exception as e:
             logging.error(f"Gemini API error: {str(e)}")
             return f"Error processing your query: {str(e)}"
 
+    def _cache_lookup(self, query_vec, chunk_ids) -> Optional[str]:
+        """Return a cached answer for a similar question that was grounded in similar chunks"""
+        with self._cache_lock:
+            if not self._cache:
+                return None
+
+            scores = self._cache_keys[:len(self._cache)] @ query_vec
+            for row in np.argsort(scores)[::-1]:
+                # Gate 1: the questions must be semantically close
+                if scores[row] < self.config.SEMANTIC_CACHE_THRESHOLD:
+                    break
+
+                # Gate 2: the retrieved evidence must largely overlap
+                cached_ids, answer = self._cache[int(row)]
+                union = chunk_ids | cached_ids
+                overlap = len(chunk_ids & cached_ids) / len(union) if union else 1.0
+                if overlap >= self.config.SEMANTIC_CACHE_MIN_OVERLAP:
+                    self._cache.move_to_end(int(row))
+                    logging.info(f"Semantic cache hit (score={scores[row]:.3f}, overlap={overlap:.2f})")
+                    return answer
+
+            return None
+
+    def _cache_insert(self, query_vec, chunk_ids, answer: str) -> None:
+        """Store an answer, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            if len(self._cache) >= self.config.SEMANTIC_CACHE_SIZE:
+                row, _ = self._cache.popitem(last=False)
+            else:
+                row = len(self._cache)
+                if self._cache_keys is None or row >= len(self._cache_keys):
+                    # Grow the key buffer geometrically so lookups stay a single matmul
+                    capacity = min(max(16, row * 2), self.config.SEMANTIC_CACHE_SIZE)
+                    keys = np.empty((capacity, query_vec.shape[0]), dtype=np.float32)
+                    if self._cache_keys is not None:
+                        keys[:row] = self._cache_keys[:row]
+                    self._cache_keys = keys
+
+            self._cache_keys[row] = query_vec
+            self._cache[row] = (chunk_ids, answer)
+
+    def _prepare_query(self, question: str):
+        """Embed and retrieve for a question; return (query_vec, chunk_ids, cached answer or None, prompt)"""
+        query_vec = self.embedder.encode(question, normalize_embeddings=True).astype(np.float32)
+        context, chunk_ids = self.custom_retriever(question)
+        cached = self._cache_lookup(query_vec, chunk_ids)
+        prompt_str = self._template_str.format_map({"context": context, "question": question})
+        return query_vec, chunk_ids, cached, prompt_str
+
+    def _generation_config(self) -> dict:
+        return {
+            "temperature": self.config.GEMINI_TEMPERATURE,
+            "max_output_tokens": 300
+        }
+
+    def _store_answer(self, query_vec, chunk_ids, answer: str) -> None:
+        """Cache a generated answer unless it is empty or an error message"""
+        logging.info(f"Response: {answer}")
+        if answer and answer.strip() and not answer.startswith("Error processing your query"):
+            self._cache_insert(query_vec, chunk_ids, answer)
+
     def query_policy(self, question: str, user_grade: Optional[str] = None) -> str:
-        if not self.chain:
+        if not self._template_str:
             return "System initializing, please wait..."
 
         try:
+            query_vec, chunk_ids, cached, prompt_str = self._prepare_query(question)
+            if cached is not None:
+                return cached
+
             logging.info(f"Processing query with custom reranking: {question}")
-            response = self.chain.invoke({
-                "question": question
-                
-            })
-            logging.info(f"Response: {response}")
+            response = self._invoke_gemini(prompt_str)
+            self._store_answer(query_vec, chunk_ids, response)
             return response
         except Exception as e:
             logging.error(f"Query processing error: {str(e)}")
             return f"Error processing your query: {str(e)}"
+
+    def stream_policy(self, question: str, user_grade: Optional[str] = None) -> Iterator[str]:
+        """Yield the answer to a policy question in chunks as Gemini generates it"""
+        if not self._template_str:
+            yield "System initializing, please wait..."
+            return
+
+        try:
+            query_vec, chunk_ids, cached, prompt_str = self._prepare_query(question)
+            if cached is not None:
+                yield cached
+                return
+
+            logging.info(f"Streaming query with custom reranking: {question}")
+            response = self.llm.generate_content(
+                prompt_str,
+                generation_config=self._generation_config(),
+                stream=True
+            )
+
+            parts = []
+            for chunk in response:
+                parts.append(chunk.text)
+                yield chunk.text
+
+            self._store_answer(query_vec, chunk_ids, "".join(parts).strip())
+        except Exception as e:
+            logging.error(f"Query streaming error: {str(e)}")
+            yield f"Error processing your query: {str(e)}"
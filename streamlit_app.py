@@ -1,12 +1,15 @@
 import streamlit as st
 import time
+import uuid
+from copy import copy
 from datetime import datetime
 from config import Config
 from auth import Authenticator
 from data_loader import PolicyDataLoader
 from rag_system import PolicyRAGSystem
 from query_handler import QueryHandler
-import google.generativeai as genai
+from chat_store import ChatHistoryStore
+from streamlit_cookies_manager import CookieManager
 
 # Page configuration
 st.set_page_config(
@@ -16,9 +19,25 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Load custom CSS
-def load_css():
-    st.markdown("""
+# Session state defaults
+_SESSION_DEFAULTS = {
+    "authenticated": False,
+    "user": None,
+    "chat_history": [],
+    "rendered_chat": [],
+    "system_initialized": False,
+    "authenticator": None,
+    "query_handler": None,
+}
+
+def _render_msg(role: str, content: str) -> str:
+    """HTML for a single chat message"""
+    if role == "user":
+        return f'<div class="user-message">👤 {content}</div>'
+    return f'<div class="assistant-message">🤖 {content}</div>'
+
+# Custom CSS
+_CSS = """
     <style>
     .main-header {
         text-align: center;
@@ -97,25 +116,45 @@ def load_css():
         transform: translateY(-2px);
     }
     </style>
-    """, unsafe_allow_html=True)
+"""
+
+# Load custom CSS
+def load_css():
+    # Streamlit drops elements that are not re-emitted on a rerun, so this runs every time
+    st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def _build_rag(config_key: str) -> PolicyRAGSystem:
+    """Build the RAG system once per process and share it across all sessions"""
+    config = Config()
+    
+    # Initialize document loader
+    document_loader = PolicyDataLoader(config_key)
+    document_loader.load_all_documents()
+    
+    # Initialize RAG system
+    rag_system = PolicyRAGSystem(
+        retriever=document_loader.get_retriever(),
+        config=config,
+        data_loader=document_loader
+    )
+    rag_system.initialize_llm()
+    rag_system.setup_qa_chain()
+    return rag_system
+
+@st.cache_resource(show_spinner=False)
+def _chat_store(db_path: str) -> ChatHistoryStore:
+    """Open the chat history store once per process"""
+    return ChatHistoryStore(db_path)
 
 class BankPolicyWebApp:
     def __init__(self):
         self.config = Config()
+        self.chat_store = _chat_store(self.config.CHAT_DB_PATH)
         
-        # Initialize session state
-        if 'authenticated' not in st.session_state:
-            st.session_state.authenticated = False
-        if 'user' not in st.session_state:
-            st.session_state.user = None
-        if 'chat_history' not in st.session_state:
-            st.session_state.chat_history = []
-        if 'system_initialized' not in st.session_state:
-            st.session_state.system_initialized = False
-        if 'authenticator' not in st.session_state:
-            st.session_state.authenticator = None
-        if 'query_handler' not in st.session_state:
-            st.session_state.query_handler = None
+        # Initialize session state (copied so sessions never share a mutable default)
+        for key, value in _SESSION_DEFAULTS.items():
+            st.session_state.setdefault(key, copy(value))
 
     def initialize_system(self):
         """Initialize the RAG system components"""
@@ -124,24 +163,8 @@ class BankPolicyWebApp:
             
         try:
             with st.spinner("🔄 Initializing Bank Policy Assistant..."):
-                # Configure Gemini API
-                genai.configure(api_key=self.config.GEMINI_API_KEY)
-                
-                # Initialize document loader
-                document_loader = PolicyDataLoader(self.config.POLICY_PDF_PATH)
-                document_loader.load_all_documents()
-                
-                # Initialize RAG system
-                rag_system = PolicyRAGSystem(
-                    retriever=document_loader.get_retriever(),
-                    config=self.config,
-                    data_loader=document_loader
-                )
-                rag_system.initialize_llm()
-                rag_system.setup_qa_chain()
-                
-                # Store in session state
-                st.session_state.rag_system = rag_system
+                # Shared RAG system (built once per process)
+                st.session_state.rag_system = _build_rag(self.config.POLICY_PDF_PATH)
                 st.session_state.system_initialized = True
                 
                 st.success("✅ System initialized successfully!")
@@ -179,6 +202,12 @@ class BankPolicyWebApp:
                                 st.session_state.authenticated = True
                                 st.session_state.user = user
                                 st.session_state.authenticator = authenticator
+                                st.session_state.chat_history = self.chat_store.load(
+                                    st.session_state.session_id, user['username']
+                                )
+                                st.session_state.rendered_chat = [
+                                    _render_msg(m["role"], m["content"]) for m in st.session_state.chat_history
+                                ]
                                 st.success("✅ Authentication successful!")
                                 time.sleep(1)
                                 st.rerun()
@@ -227,12 +256,12 @@ class BankPolicyWebApp:
         # Chat container
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
         
-        # Display chat history
-        for message in st.session_state.chat_history:
-            if message["role"] == "user":
-                st.markdown(f'<div class="user-message">👤 {message["content"]}</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div class="assistant-message">🤖 {message["content"]}</div>', unsafe_allow_html=True)
+        # Display chat history (rendered incrementally in process_query)
+        if st.session_state.rendered_chat:
+            st.markdown("".join(st.session_state.rendered_chat), unsafe_allow_html=True)
+        
+        # Slot for the message being streamed, so it renders in place below the history
+        live = st.container()
         
         st.markdown('</div>', unsafe_allow_html=True)
 
@@ -254,32 +283,58 @@ class BankPolicyWebApp:
                 )
             with col2:
                 submit = st.form_submit_button("📤 Send", use_container_width=True)
-            
-            if submit and user_query:
-                self.process_query(user_query)
+        
+        # Handle the submit outside the form so the streamed reply lands in the live slot
+        if submit and user_query:
+            self.process_query(user_query, live)
 
-    def process_query(self, query):
-        """Process user query and update chat"""
+    def process_query(self, query, live):
+        """Process user query, streaming the exchange into the live container, and update chat"""
         # Add user message to chat
         st.session_state.chat_history.append({"role": "user", "content": query})
+        st.session_state.rendered_chat.append(_render_msg("user", query))
+        
+        live.markdown(_render_msg("user", query), unsafe_allow_html=True)
         
+        # Stream the response into a placeholder as it is generated
+        placeholder = live.empty()
+        chunks = []
         try:
-            # Get response from query handler
-            with st.spinner("Thinking..."):
-                response = st.session_state.query_handler.handle_query(query)
-            
-            # Add assistant response to chat
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
+            for chunk in st.session_state.query_handler.stream_query(query):
+                chunks.append(chunk)
+                placeholder.markdown(_render_msg("assistant", "".join(chunks)), unsafe_allow_html=True)
+            response = "".join(chunks).strip()
             
         except Exception as e:
-            error_msg = f"⚠️ Sorry, there was an error processing your request: {str(e)}"
-            st.session_state.chat_history.append({"role": "assistant", "content": error_msg})
+            response = f"⚠️ Sorry, there was an error processing your request: {str(e)}"
+            placeholder.markdown(_render_msg("assistant", response), unsafe_allow_html=True)
         
-        # Rerun to update the interface
-        st.rerun()
+        # Add assistant response to chat (already on screen, so no rerun needed)
+        st.session_state.chat_history.append({"role": "assistant", "content": response})
+        st.session_state.rendered_chat.append(_render_msg("assistant", response))
+        
+        # Persist this exchange so it survives a page refresh
+        self.chat_store.append(
+            st.session_state.session_id,
+            st.session_state.user['username'],
+            st.session_state.chat_history[-2:]
+        )
+
+    def load_session_id(self):
+        """Read the per-browser session id from a cookie, creating it on first visit"""
+        cookies = CookieManager()
+        if not cookies.ready():
+            st.stop()
+        
+        if not cookies.get("session_id"):
+            cookies["session_id"] = uuid.uuid4().hex
+            cookies.save()
+        st.session_state.session_id = cookies["session_id"]
 
     def logout(self):
         """Handle user logout"""
+        self.chat_store.clear(st.session_state.session_id, st.session_state.user['username'])
+        
         # Clear all session state
         for key in list(st.session_state.keys()):
             del st.session_state[key]
@@ -290,6 +345,7 @@ class BankPolicyWebApp:
     def run(self):
         """Main application runner"""
         load_css()
+        self.load_session_id()
         
         if st.session_state.authenticated:
             self.show_chat_interface()